@@ -369,6 +369,10 @@ class Forces:
 
     def append(self, x, y, z, units):
         """Append x, y, z as a tuple to the end of the list."""
+        self.extend(((x, y, z),), units)
+
+    def extend(self, forces, units):
+        """Append each x, y, z in forces as a tuple to the end of the list."""
         if units is enums.ForceUnits.NEWTON:
             factor = 1
         elif units is enums.ForceUnits.DYNE:
@@ -379,7 +383,8 @@ class Forces:
             factor = sc.HARTREE_PER_BOHR_TO_NEWTON
         else:
             raise ValueError(f"Unknown Force units: {units}")
-        self._forces.append(tuple(i * factor for i in (x, y, z)))
+        self._forces.extend((x * factor, y * factor, z * factor)
+                            for x, y, z in forces)
 
     def as_newton(self, index=None):
         """Return the entire list or specific index in newtons."""
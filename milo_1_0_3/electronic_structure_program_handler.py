@@ -2,13 +2,30 @@
 # -*- coding: utf-8 -*-
 """Handle calling ESPs and parsing output."""
 
+import asyncio
+import contextlib
+import itertools
+import mmap
 import os
+import re
+import subprocess
 
 from milo_1_0_3 import containers
 from milo_1_0_3 import enumerations as enums
 from milo_1_0_3 import exceptions
 
 
+# Results of parsed log files, keyed on (path, modification time, size)
+_PARSE_CACHE = dict()
+_PARSE_CACHE_SIZE = 64
+
+# Geometry block format strings, keyed on the atom symbols they contain
+_GEOMETRY_TEMPLATES = dict()
+
+# Match the empty line that ends an ORCA gradient table
+_BLANK_LINE_PATTERN = re.compile(rb"^[ \t\r]*$", re.MULTILINE)
+
+
 def get_program_handler(program_state):
     """Return the configured electronic structure program handler."""
     if program_state.program_id is enums.ProgramID.GAUSSIAN_16:
@@ -22,100 +39,370 @@ def get_program_handler(program_state):
                          f'"{program_state.program_id}"')
 
 
+async def generate_forces_batch(program_states):
+    """
+    Generate forces for several program states concurrently.
+
+    No more jobs run at once than fit on the CPUs available to this
+    process, given the largest processor_count of the batch. Job files
+    are prefixed with each program state's index in the batch so that
+    states at the same step do not overwrite each other's files.
+    """
+    processor_count = max((program_state.processor_count or 1
+                           for program_state in program_states), default=1)
+    if hasattr(os, "sched_getaffinity"):
+        # Only count the CPUs this process may run on (e.g. under SLURM)
+        available_cpus = len(os.sched_getaffinity(0))
+    else:
+        available_cpus = os.cpu_count() or 1
+    job_limit = asyncio.Semaphore(max(1, available_cpus // processor_count))
+
+    async def generate_forces(index, program_state):
+        async with job_limit:
+            await get_program_handler(program_state).generate_forces_async(
+                program_state, f"{index}_")
+
+    await asyncio.gather(*(generate_forces(index, program_state)
+                           for index, program_state
+                           in enumerate(program_states)))
+
+
+def _run_program(arguments, input_file_name, output_file_name):
+    """
+    Run a program to completion and return its exit code.
+
+    The program reads stdin from input_file_name (unless it is None) and
+    writes stdout to output_file_name. posix_spawn is used when available
+    so that the (possibly large) Milo process does not have to be forked.
+    """
+    if not hasattr(os, "posix_spawnp"):
+        with contextlib.ExitStack() as stack:
+            stdin = None
+            if input_file_name is not None:
+                stdin = stack.enter_context(open(input_file_name, 'rb'))
+            stdout = stack.enter_context(open(output_file_name, 'wb'))
+            try:
+                return subprocess.run(arguments, stdin=stdin,
+                                      stdout=stdout).returncode
+            except OSError as e:
+                raise _launch_error(arguments[0], e)
+    file_actions = [(os.POSIX_SPAWN_OPEN, 1, output_file_name,
+                     os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)]
+    if input_file_name is not None:
+        file_actions.append((os.POSIX_SPAWN_OPEN, 0, input_file_name,
+                             os.O_RDONLY, 0))
+    try:
+        pid = os.posix_spawnp(arguments[0], arguments, os.environ,
+                              file_actions=file_actions)
+    except OSError as e:
+        raise _launch_error(arguments[0], e)
+    _, status = os.waitpid(pid, 0)
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+async def _run_program_async(arguments, input_file_name, output_file_name):
+    """
+    Asynchronous version of _run_program for concurrent jobs.
+
+    If the wait is interrupted (e.g. the job is cancelled because another
+    job of a batch failed), the program is killed before re-raising so it
+    does not outlive Milo.
+    """
+    with contextlib.ExitStack() as stack:
+        stdin = None
+        if input_file_name is not None:
+            stdin = stack.enter_context(open(input_file_name, 'rb'))
+        stdout = stack.enter_context(open(output_file_name, 'wb'))
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *arguments, stdin=stdin, stdout=stdout)
+        except OSError as e:
+            raise _launch_error(arguments[0], e)
+        try:
+            return await process.wait()
+        except BaseException:
+            process.kill()
+            await process.wait()
+            raise
+
+
+def _launch_error(program, error):
+    """Return an ElectronicStructureProgramError for a failed launch."""
+    return exceptions.ElectronicStructureProgramError(
+        f"Could not call {program}: {error}")
+
+
+def _check_return_code(program_name, return_code):
+    """Raise an ElectronicStructureProgramError if the ESP call failed."""
+    if return_code != 0:
+        raise exceptions.ElectronicStructureProgramError(
+            f"{program_name} exited with return code {return_code}. It "
+            f"returned an error or could not be called correctly.")
+
+
+def _map_log(log_file, needle=None):
+    """
+    Return a context manager giving read only access to a log's bytes.
+
+    If the log cannot be memory mapped (it is empty, as a failed ESP call
+    can leave it, or the file system does not support mmap), it is read
+    instead: only back to the last needle if one is given, otherwise all
+    of it.
+    """
+    try:
+        return mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        if needle is None:
+            return contextlib.nullcontext(log_file.read())
+        return contextlib.nullcontext(_read_tail(log_file, needle))
+
+
+def _read_tail(log_file, needle, chunk_size=65536):
+    """Return the end of log_file, reading backward until needle is found."""
+    start = log_file.seek(0, os.SEEK_END)
+    chunks = list()
+    # Start of the bytes already read, so needles spanning two chunks are
+    # found without searching the whole tail again
+    overlap = b""
+    while start > 0:
+        chunk_start = max(0, start - chunk_size)
+        log_file.seek(chunk_start)
+        chunk = log_file.read(start - chunk_start)
+        chunks.append(chunk)
+        start = chunk_start
+        searched = chunk + overlap
+        if needle in searched:
+            break
+        overlap = searched[:len(needle) - 1]
+    return b"".join(reversed(chunks))
+
+
+def _read_log_cached(log_file_name, read_log):
+    """Return read_log(log_file_name), reusing results for unchanged files."""
+    status = os.stat(log_file_name)
+    key = (os.path.abspath(log_file_name), status.st_mtime_ns,
+           status.st_size)
+    if key not in _PARSE_CACHE:
+        if len(_PARSE_CACHE) >= _PARSE_CACHE_SIZE:
+            del _PARSE_CACHE[next(iter(_PARSE_CACHE))]
+        _PARSE_CACHE[key] = read_log(log_file_name)
+    return _PARSE_CACHE[key]
+
+
+def _append_log_results(program_state, forces_values, energy_values):
+    """Append new Forces and Energies objects built from parsed values."""
+    force_units = enums.ForceUnits.HARTREE_PER_BOHR
+    energy_units = enums.EnergyUnits.HARTREE
+    forces = containers.Forces()
+    forces.extend(forces_values, force_units)
+    energy = containers.Energies()
+    for value in energy_values:
+        energy.append(value, energy_units)
+    program_state.energies.append(energy)
+    program_state.forces.append(forces)
+
+
+def _parse_forces_block(block):
+    """
+    Return forces (hartree/bohr) from the rows of a Gaussian forces table.
+
+    Every row is "center atomic_number x y z", so the whole block is
+    split at once and the x, y, and z columns are taken with strided
+    slices.
+    """
+    tokens = block.split()
+    return list(zip(map(float, tokens[2::5]), map(float, tokens[3::5]),
+                    map(float, tokens[4::5])))
+
+
+def _parse_gradient_block(block):
+    """
+    Return forces (hartree/bohr) from the rows of an ORCA gradient table.
+
+    Every row is "index symbol : x y z", so the whole block is split at
+    once and the x, y, and z columns are taken with strided slices.
+    """
+    tokens = block.split()
+    return [(-x, -y, -z) for x, y, z in zip(map(float, tokens[3::6]),
+                                            map(float, tokens[4::6]),
+                                            map(float, tokens[5::6]))]
+
+
+def _write_input_file(file_name, contents):
+    """Write contents to file_name with unbuffered writes on a raw fd."""
+    remaining = memoryview(contents.encode())
+    file_descriptor = os.open(file_name,
+                              os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while remaining:
+            remaining = remaining[os.write(file_descriptor, remaining):]
+    finally:
+        os.close(file_descriptor)
+
+
+def _format_geometry(program_state):
+    """Return the current structure as input file lines in angstrom."""
+    symbols = tuple(atom.symbol for atom in program_state.atoms)
+    if symbols not in _GEOMETRY_TEMPLATES:
+        _GEOMETRY_TEMPLATES[symbols] = "".join(
+            f"  {symbol} %10.6f %10.6f %10.6f\n" for symbol in symbols)
+    positions = program_state.structures[-1].as_angstrom()
+    return _GEOMETRY_TEMPLATES[symbols] % tuple(
+        itertools.chain.from_iterable(positions[:len(symbols)]))
+
+
 class GaussianHandler:
     """Template handler for Gaussian16Handler and Gaussian09Handler."""
 
     gaussian_command = ""
+    _com_file_templates = dict()
 
     @classmethod
     def generate_forces(cls, program_state):
         """Preform computation and append forces to list in program state."""
-        route_section = f"# force {program_state.gaussian_header}"
-        log_file = cls.call_gaussian(route_section,
-                                     f"{cls.gaussian_command}"
-                                     f"_{program_state.current_step}",
+        log_file = cls.call_gaussian(*cls._job_details(program_state),
                                      program_state)
         cls.parse_forces(log_file, program_state)
 
+    @classmethod
+    async def generate_forces_async(cls, program_state, job_prefix=""):
+        """Asynchronous version of generate_forces for concurrent jobs."""
+        log_file = await cls.call_gaussian_async(
+            *cls._job_details(program_state, job_prefix), program_state)
+        cls.parse_forces(log_file, program_state)
+
     @classmethod
     def call_gaussian(cls, route_section, job_name, program_state):
         """Call Gaussian and return a string with the name of the log file."""
+        arguments, job_com_file, job_log_file = cls._prepare_job(
+            route_section, job_name, program_state)
+        return_code = _run_program(arguments, job_com_file, job_log_file)
+        _check_return_code("Gaussian", return_code)
+        return job_log_file
+
+    @classmethod
+    async def call_gaussian_async(cls, route_section, job_name,
+                                  program_state):
+        """Call Gaussian without blocking the event loop."""
+        arguments, job_com_file, job_log_file = cls._prepare_job(
+            route_section, job_name, program_state)
+        return_code = await _run_program_async(arguments, job_com_file,
+                                               job_log_file)
+        _check_return_code("Gaussian", return_code)
+        return job_log_file
+
+    @classmethod
+    def _job_details(cls, program_state, job_prefix=""):
+        """Return the route section and job name for the current step."""
+        route_section = f"# force {program_state.gaussian_header}"
+        job_name = (f"{job_prefix}{cls.gaussian_command}"
+                    f"_{program_state.current_step}")
+        return route_section, job_name
+
+    @classmethod
+    def _prepare_job(cls, route_section, job_name, program_state):
+        """Write the .com file and return the command, stdin file, and log."""
         job_com_file = f"{job_name}.com"
         job_log_file = f"{job_name}.log"
         cls.prepare_com_file(job_com_file, route_section, program_state)
-        os.system(f"{cls.gaussian_command} < {job_com_file} > {job_log_file}")
-        return job_log_file
+        return [cls.gaussian_command], job_com_file, job_log_file
 
-    @staticmethod
-    def prepare_com_file(file_name, route_section, program_state):
+    @classmethod
+    def prepare_com_file(cls, file_name, route_section, program_state):
         """Prepare a .com file for a Gaussian run."""
-        with open(file_name, 'w') as com_file:
+        header, charge_and_spin, footer = cls._com_file_template(
+            route_section, program_state)
+        _write_input_file(file_name, f"{header}{program_state.current_step}"
+                                     f"{charge_and_spin}"
+                                     f"{_format_geometry(program_state)}"
+                                     f"{footer}")
+
+    @classmethod
+    def _com_file_template(cls, route_section, program_state):
+        """Return the parts of a .com file that do not change between steps."""
+        key = (route_section, program_state.processor_count,
+               program_state.memory_amount, program_state.charge,
+               program_state.spin, program_state.gaussian_footer)
+        if key not in cls._com_file_templates:
+            header = ""
             if program_state.processor_count is not None:
-                com_file.write(f"%nprocshared="
-                               f"{program_state.processor_count}\n")
+                header += f"%nprocshared={program_state.processor_count}\n"
             if program_state.memory_amount is not None:
-                com_file.write(f"%mem="
-                               f"{program_state.memory_amount}gb\n")
-            com_file.write(f"{route_section}\n\n")
-            com_file.write(f"Calculation for time step: "
-                           f"{program_state.current_step}\n\n")
-            com_file.write(f" {program_state.charge}"
-                           f" {program_state.spin}\n")
-            for atom, (x, y, z) in zip(program_state.atoms,
-                                       program_state.structures[-1]
-                                       .as_angstrom()):
-                com_file.write(f"  {atom.symbol} {x:10.6f} {y:10.6f} "
-                               f"{z:10.6f}\n")
-            com_file.write("\n")
+                header += f"%mem={program_state.memory_amount}gb\n"
+            header += f"{route_section}\n\nCalculation for time step: "
+            charge_and_spin = (f"\n\n {program_state.charge}"
+                               f" {program_state.spin}\n")
+            footer = "\n"
             if program_state.gaussian_footer is not None:
-                com_file.write(program_state.gaussian_footer)
-            com_file.write("\n\n")
+                footer += program_state.gaussian_footer
+            footer += "\n\n"
+            cls._com_file_templates[key] = (header, charge_and_spin, footer)
+        return cls._com_file_templates[key]
 
     @classmethod
     def parse_forces(cls, log_file_name, program_state):
         """Parse forces into program_state from the given log file."""
-        if not cls.is_log_good(log_file_name):
-            raise exceptions.ElectronicStructureProgramError(
-                "Gaussian force calculation log file was not valid. Gaussian "
-                "returned an error or could not be called correctly.")
-        forces = containers.Forces()
-        energy = containers.Energies()
-        with open(log_file_name) as log_file:
-            for line in log_file:
-                if "SCF Done" in line:
-                    value = float(line.split()[4])
-                    energy.append(value, enums.EnergyUnits.HARTREE)
-                    program_state.energies.append(energy)
-                if "Forces (Hartrees/Bohr)" in line:
-                    for data_line in log_file:
-                        if "Cartesian Forces" in data_line:
-                            program_state.forces.append(forces)
-                            return
-                        else:
-                            tokens = data_line.split()
-                            try:
-                                # This will throw an error if the first item
-                                # on the line is not an integer, and the line
-                                # will be skipped.
-                                int(tokens[0])
-                            except ValueError:
-                                continue
-                            else:
-                                x = float(tokens[2])
-                                y = float(tokens[3])
-                                z = float(tokens[4])
-                                forces.append(x, y, z,
-                                    enums.ForceUnits.HARTREE_PER_BOHR)
+        _append_log_results(program_state,
+                            *_read_log_cached(log_file_name, cls._read_log))
 
-    @staticmethod
-    def is_log_good(log_file_name):
+    @classmethod
+    def _read_log(cls, log_file_name):
+        """Return forces (hartree/bohr) and energies (hartree) from a log."""
+        with open(log_file_name, 'rb') as log_file, \
+                _map_log(log_file) as log:
+            if not cls._terminated_normally(log):
+                raise exceptions.ElectronicStructureProgramError(
+                    "Gaussian force calculation log file was not valid. "
+                    "Gaussian returned an error or could not be called "
+                    "correctly.")
+            forces_start = log.rfind(b"Forces (Hartrees/Bohr)")
+            forces_end = log.find(b"Cartesian Forces", max(forces_start, 0))
+            if forces_start == -1 or forces_end == -1:
+                raise exceptions.ElectronicStructureProgramError(
+                    "Gaussian force calculation log file did not contain "
+                    "forces.")
+            # The rows start three lines below the header and end at the
+            # separator line just above "Cartesian Forces".
+            block_start = forces_start
+            for _ in range(3):
+                block_start = log.find(b"\n", block_start) + 1
+            block_end = log.rfind(b"\n", block_start,
+                                  log.rfind(b"\n", block_start, forces_end))
+            forces = _parse_forces_block(log[block_start:block_end + 1])
+
+            energy_start = log.rfind(b"SCF Done", 0, forces_start)
+            if energy_start == -1:
+                raise exceptions.ElectronicStructureProgramError(
+                    "Gaussian force calculation log file did not contain "
+                    "an SCF energy.")
+            energy_end = log.find(b"\n", energy_start)
+            if energy_end == -1:
+                energy_end = len(log)
+            energies = [float(log[energy_start:energy_end].split()[4])]
+        return forces, energies
+
+    @classmethod
+    def is_log_good(cls, log_file_name):
         """Return true if the given log file terminated normally."""
-        with open(log_file_name) as log_file:
-            for line in log_file:
-                if "Normal termination" in line:
-                    return True
-            else:
-                return False
+        with open(log_file_name, 'rb') as log_file, \
+                _map_log(log_file) as log:
+            return cls._terminated_normally(log)
+
+    @staticmethod
+    def _terminated_normally(log):
+        """
+        Return true if the last job in the log bytes terminated normally.
+
+        Every job of a --Link1-- log ends with either "Normal termination"
+        or "Error termination", so only the last of these counts. Errors
+        are only searched for after the last normal termination, which
+        keeps the check to the tail of a healthy log.
+        """
+        normal_termination = log.rfind(b"Normal termination")
+        return (normal_termination != -1 and
+                log.find(b"Error termination", normal_termination) == -1)
 
 
 class Gaussian16Handler(GaussianHandler):
@@ -133,72 +420,122 @@ class Gaussian09Handler(GaussianHandler):
 class OrcaHandler:
     """Handler for ORCA5"""
 
+    _com_file_templates = dict()
+
     @classmethod
     def generate_forces(cls, program_state):
         """Preform computation and append forces to list in program state."""
-        route_section = f"ENGRAD {program_state.gaussian_header}"
-        log_file = cls.call_orca(route_section,
-                                     f"orca_{program_state.current_step}",
-                                     program_state)
+        log_file = cls.call_orca(*cls._job_details(program_state),
+                                 program_state)
+        cls.parse_forces(log_file, program_state)
+
+    @classmethod
+    async def generate_forces_async(cls, program_state, job_prefix=""):
+        """Asynchronous version of generate_forces for concurrent jobs."""
+        log_file = await cls.call_orca_async(
+            *cls._job_details(program_state, job_prefix), program_state)
         cls.parse_forces(log_file, program_state)
 
     @classmethod
     def call_orca(cls, route_section, job_name, program_state):
         """Call Orca and return a string with the name of the log file."""
+        arguments, job_input_file, job_log_file = cls._prepare_job(
+            route_section, job_name, program_state)
+        return_code = _run_program(arguments, job_input_file, job_log_file)
+        _check_return_code("ORCA", return_code)
+        return job_log_file
+
+    @classmethod
+    async def call_orca_async(cls, route_section, job_name, program_state):
+        """Call Orca without blocking the event loop."""
+        arguments, job_input_file, job_log_file = cls._prepare_job(
+            route_section, job_name, program_state)
+        return_code = await _run_program_async(arguments, job_input_file,
+                                               job_log_file)
+        _check_return_code("ORCA", return_code)
+        return job_log_file
+
+    @staticmethod
+    def _job_details(program_state, job_prefix=""):
+        """Return the route section and job name for the current step."""
+        route_section = f"ENGRAD {program_state.gaussian_header}"
+        job_name = f"{job_prefix}orca_{program_state.current_step}"
+        return route_section, job_name
+
+    @classmethod
+    def _prepare_job(cls, route_section, job_name, program_state):
+        """
+        Write the .inp file and return the command, stdin file, and log.
+
+        ORCA reads the .inp file from its arguments, so it gets no stdin.
+        """
         job_com_file = f"{job_name}.inp"
         job_log_file = f"{job_name}.out"
         cls.prepare_com_file(job_com_file, route_section, program_state)
-        os.system(f"{program_state.orca_path}/orca {job_com_file} > {job_log_file}")
-        return job_log_file
+        return ([f"{program_state.orca_path}/orca", job_com_file], None,
+                job_log_file)
 
-    @staticmethod
-    def prepare_com_file(file_name, route_section, program_state):
+    @classmethod
+    def prepare_com_file(cls, file_name, route_section, program_state):
         """Prepare a .inp file for an Orca."""
-        with open(file_name, 'w') as com_file:
-            com_file.write(f"!{route_section}\n\n")
+        header, footer = cls._com_file_template(route_section, program_state)
+        _write_input_file(file_name, f"{header}"
+                                     f"{_format_geometry(program_state)}"
+                                     f"{footer}")
+
+    @classmethod
+    def _com_file_template(cls, route_section, program_state):
+        """Return the parts of a .inp file that do not change between steps."""
+        key = (route_section, program_state.processor_count,
+               program_state.memory_amount, program_state.charge,
+               program_state.spin, program_state.gaussian_footer)
+        if key not in cls._com_file_templates:
+            header = f"!{route_section}\n\n"
             if program_state.processor_count is not None:
-                com_file.write(f"%pal\n"
-                               f"nproc {program_state.processor_count}\n"
-                               f"end\n")
+                header += (f"%pal\n"
+                           f"nproc {program_state.processor_count}\n"
+                           f"end\n")
                 if program_state.memory_amount is not None:
-                    com_file.write(f"%MaxCore {program_state.memory_amount*1024//program_state.processor_count}\n")
-
-            com_file.write(f"*xyz {program_state.charge} {program_state.spin}\n")
-            for atom, (x, y, z) in zip(program_state.atoms,
-                                       program_state.structures[-1]
-                                       .as_angstrom()):
-                com_file.write(f"  {atom.symbol} {x:10.6f} {y:10.6f} "
-                               f"{z:10.6f}\n")
-            com_file.write("*\n")
+                    max_core = (program_state.memory_amount * 1024
+                                // program_state.processor_count)
+                    header += f"%MaxCore {max_core}\n"
+            header += f"*xyz {program_state.charge} {program_state.spin}\n"
+            footer = "*\n"
             if program_state.gaussian_footer is not None:
-                com_file.write(program_state.gaussian_footer)
-            com_file.write("\n\n")
+                footer += program_state.gaussian_footer
+            footer += "\n\n"
+            cls._com_file_templates[key] = (header, footer)
+        return cls._com_file_templates[key]
 
     @classmethod
     def parse_forces(cls, log_file_name, program_state):
         """Parse forces into program_state from the given log file."""
+        _append_log_results(program_state,
+                            *_read_log_cached(log_file_name, cls._read_log))
 
-        with open(log_file_name) as f:
-            lines = f.readlines()
-            ind = len(lines)-1
-
-        while lines[ind].find("CARTESIAN GRADIENT") == -1:
-            ind -= 1
-
-        max_norm = 0
-
-        forces = containers.Forces()
-        energy = containers.Energies()
+    @staticmethod
+    def _read_log(log_file_name):
+        """Return forces (hartree/bohr) and energies (hartree) from a log."""
+        with open(log_file_name, 'rb') as log_file, \
+                _map_log(log_file, b"FINAL SINGLE POINT ENERGY") as log:
+            gradient_start = log.rfind(b"CARTESIAN GRADIENT")
+            energy_start = log.rfind(b"FINAL SINGLE POINT ENERGY", 0,
+                                     max(gradient_start, 0))
+            if gradient_start == -1 or energy_start == -1:
+                raise exceptions.ElectronicStructureProgramError(
+                    "ORCA force calculation log file was not valid. ORCA "
+                    "returned an error or could not be called correctly.")
 
-        ind += 3
-        while lines[ind].strip() != "":
-            sline = lines[ind].split()
-            forces.append(*[-float(i) for i in sline[3:]], enums.ForceUnits.HARTREE_PER_BOHR)
-            ind += 1
+            # The gradient table starts three lines below its title.
+            block_start = gradient_start
+            for _ in range(3):
+                block_start = log.find(b"\n", block_start) + 1
+            blank_line = _BLANK_LINE_PATTERN.search(log, block_start)
+            block_end = blank_line.start() if blank_line else len(log)
+            forces = _parse_gradient_block(log[block_start:block_end])
 
-        while lines[ind].find("FINAL SINGLE POINT ENERGY") == -1:
-            ind -= 1
-        E = float(lines[ind].split()[-1])
-        energy.append(E, enums.EnergyUnits.HARTREE)
-        program_state.energies.append(energy)
-        program_state.forces.append(forces)
+            energy_end = log.find(b"\n", energy_start)
+            if energy_end == -1:
+                energy_end = len(log)
+            energies = [float(log[energy_start:energy_end].split()[-1])]
+        return forces, energies